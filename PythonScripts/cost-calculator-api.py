@@ -2,8 +2,13 @@
 API-friendly version of cost-calculator.py
 Accepts JSON input via command line argument and outputs JSON
 """
+import os
 import sys
 import json
+import numpy as np
+from trade_policy import PolicyTimeline, run_scenarios
+from freight_model import FreightModel, DEFAULT_FREIGHT_INDEX_PATH, sample_landed_costs, summarize_draws
+from provenance_ledger import run_with_ledger, data_versions
 
 COUNTRY_CONFIG = {
     "US": {
@@ -45,11 +50,16 @@ TRUCK_KG_CO2_PER_TON_KM = 0.062
 SHIP_KG_CO2_PER_TON_KM = 0.010
 RAIL_KG_CO2_PER_TON_KM = 0.021
 
-def compute_landed_cost_per_ton(base_price_per_ton, cfg):
-    """Compute landed cost per ton in the US."""
+POLICY_TIMELINE = PolicyTimeline(COUNTRY_CONFIG)
+
+def compute_landed_cost_per_ton(base_price_per_ton, cfg, delivery_month=None, country=None, product=None):
+    """Compute landed cost per ton in the US. Pass delivery_month and country to use the policy in force."""
+    if delivery_month and country:
+        cfg = {**cfg, **POLICY_TIMELINE.lookup(country, delivery_month, product)}
     customs_value = base_price_per_ton
     
     import_tariff = customs_value * cfg["us_import_tariff"]
+    trade_duties = customs_value * (cfg.get("anti_dumping_duty", 0.0) + cfg.get("countervailing_duty", 0.0))
     origin_tax = customs_value * cfg["origin_tax_rate"]
     
     transport_cost = (
@@ -62,6 +72,7 @@ def compute_landed_cost_per_ton(base_price_per_ton, cfg):
     landed_cost_per_ton = (
         base_price_per_ton
         + import_tariff
+        + trade_duties
         + origin_tax
         + transport_cost
         + other_costs
@@ -70,6 +81,7 @@ def compute_landed_cost_per_ton(base_price_per_ton, cfg):
     return {
         "base_price": float(base_price_per_ton),
         "import_tariff": float(import_tariff),
+        "trade_duties": float(trade_duties),
         "origin_tax": float(origin_tax),
         "transport_cost": float(transport_cost),
         "other_costs": float(other_costs),
@@ -91,48 +103,111 @@ def compute_transport_emissions_per_ton(cfg):
         "total_kg_per_ton": float(total_kg_co2_per_ton),
     }
 
+def run_cost_calculator(data):
+    """Landed cost and transport emissions per country, plus optional scenarios and distributions."""
+    base_prices = data.get('base_prices', {})
+    total_tons = data.get('total_tons', 10000.0)
+    delivery_month = data.get('delivery_month')
+    product = data.get('product')
+    
+    results = {}
+    
+    for country in ["US", "China", "India"]:
+        if country not in base_prices:
+            continue
+            
+        cfg = COUNTRY_CONFIG[country]
+        base_price = base_prices[country]
+        
+        cost_breakdown = compute_landed_cost_per_ton(base_price, cfg, delivery_month, country, product)
+        emis_breakdown = compute_transport_emissions_per_ton(cfg)
+        
+        landed_per_ton = cost_breakdown["landed_cost_per_ton"]
+        total_cost = landed_per_ton * total_tons
+        
+        kg_per_ton = emis_breakdown["total_kg_per_ton"]
+        total_kg = kg_per_ton * total_tons
+        
+        results[country] = {
+            "cost_breakdown": cost_breakdown,
+            "emis_breakdown": emis_breakdown,
+            "landed_per_ton": float(landed_per_ton),
+            "total_cost": float(total_cost),
+            "kg_per_ton": float(kg_per_ton),
+            "total_kg": float(total_kg),
+        }
+    
+    provenance = {"status": "ok", "source": "live"}
+    output = {
+        "success": True,
+        "total_tons": float(total_tons),
+        "results": results,
+        "provenance": provenance,
+    }
+
+    # What-if policy scenarios, evaluated together in one vectorized pass
+    scenarios = data.get('scenarios')
+    if scenarios:
+        countries, landed = run_scenarios(POLICY_TIMELINE, delivery_month, base_prices, scenarios, product)
+        output["scenarios"] = [
+            {
+                "name": scenario.get("name", f"scenario_{i}"),
+                "landed_per_ton": {c: float(landed[i, j]) for j, c in enumerate(countries)},
+                "total_cost": {c: float(landed[i, j] * total_tons) for j, c in enumerate(countries)},
+            }
+            for i, scenario in enumerate(scenarios)
+        ]
+
+    # Landed-cost distributions from freight and base-price uncertainty
+    distribution = data.get('distribution')
+    if distribution:
+        # Unseeded runs get a recorded seed so they can be reproduced from the ledger
+        seed = distribution.get('seed')
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (2 ** 63))
+        countries = [c for c in POLICY_TIMELINE.countries if c in base_prices]
+        model = FreightModel.from_csv()
+        horizon = model.horizon_months(delivery_month)
+        draws = sample_landed_costs(
+            [base_prices[c] for c in countries],
+            POLICY_TIMELINE.rate_matrix(delivery_month, countries, product),
+            model,
+            n=int(distribution.get('draws', 100000)),
+            horizon=horizon,
+            base_price_sigma=distribution.get('base_price_sigma', 0.10),
+            seed=seed,
+        )
+        output["distributions"] = summarize_draws(draws, countries)
+        provenance.update({
+            "seed": seed,
+            "horizon_months": horizon,
+            "params": {"drift": model.drift.tolist(), "cov": model.cov.tolist()},
+        })
+
+    return output
+
 if __name__ == "__main__":
     try:
         # Read JSON input from command line
         input_json = sys.argv[1] if len(sys.argv) > 1 else '{}'
         data = json.loads(input_json)
-        
-        base_prices = data.get('base_prices', {})
-        total_tons = data.get('total_tons', 10000.0)
-        
-        results = {}
-        
-        for country in ["US", "China", "India"]:
-            if country not in base_prices:
-                continue
-                
-            cfg = COUNTRY_CONFIG[country]
-            base_price = base_prices[country]
-            
-            cost_breakdown = compute_landed_cost_per_ton(base_price, cfg)
-            emis_breakdown = compute_transport_emissions_per_ton(cfg)
-            
-            landed_per_ton = cost_breakdown["landed_cost_per_ton"]
-            total_cost = landed_per_ton * total_tons
-            
-            kg_per_ton = emis_breakdown["total_kg_per_ton"]
-            total_kg = kg_per_ton * total_tons
-            
-            results[country] = {
-                "cost_breakdown": cost_breakdown,
-                "emis_breakdown": emis_breakdown,
-                "landed_per_ton": float(landed_per_ton),
-                "total_cost": float(total_cost),
-                "kg_per_ton": float(kg_per_ton),
-                "total_kg": float(total_kg),
-            }
-        
+
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        versions = data_versions([
+            os.path.abspath(__file__),
+            os.path.join(script_dir, "trade_policy.py"),
+            os.path.join(script_dir, "freight_model.py"),
+            DEFAULT_FREIGHT_INDEX_PATH,
+        ])
+
+        # Repeat queries are answered from the provenance ledger. Unseeded
+        # distributions are recorded with their seed but never served as a cache hit
+        distribution = data.get('distribution')
+        output = run_with_ledger("cost", data, versions, lambda: run_cost_calculator(data),
+                                 cacheable=not distribution or distribution.get('seed') is not None)
+
         # Output JSON
-        print(json.dumps({
-            "success": True,
-            "total_tons": float(total_tons),
-            "results": results
-        }))
+        print(json.dumps(output))
     except Exception as e:
         print(json.dumps({"success": False, "error": str(e)}))
 
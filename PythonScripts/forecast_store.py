@@ -0,0 +1,259 @@
+"""
+Shared forecast store for price-predictor-api.py
+One process fits SARIMAX and publishes the scrap index series, fitted params
+and forecast horizon table to an mmap file; worker processes attach read-only
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import time
+import contextlib
+import numpy as np
+import pandas as pd
+
+STORE_MAGIC = b"FCST"
+STORE_FORMAT_VERSION = 1
+# magic, format version, generation, metadata length
+HEADER = struct.Struct("<4sIQQ")
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "forecast_store.bin")
+
+SARIMA_ORDER = (1, 1, 1)
+SARIMA_SEASONAL_ORDER = (1, 1, 1, 12)
+
+# A publisher holding the lock longer than this is assumed to have died
+PUBLISH_LOCK_STALE_SECONDS = 60.0
+
+def _align8(n):
+    return (n + 7) & ~7
+
+def _to_months(index):
+    """Month-start DatetimeIndex -> int64 months since 1970-01."""
+    return np.asarray(index.values.astype("datetime64[M]").astype(np.int64), dtype=np.int64)
+
+def _from_months(months):
+    return pd.DatetimeIndex(months.astype("datetime64[M]").astype("datetime64[ns]"), freq="MS")
+
+def _read_generation(path):
+    try:
+        with open(path, "rb") as f:
+            magic, version, generation, _ = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return 0
+    if magic != STORE_MAGIC or version != STORE_FORMAT_VERSION:
+        return 0
+    return generation
+
+@contextlib.contextmanager
+def _publish_lock(path, timeout=30.0):
+    """Serializes publishers with an O_EXCL lock file so generation numbers stay unique."""
+    lock_path = path + ".lock"
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock_path).st_mtime > PUBLISH_LOCK_STALE_SECONDS:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Timed out waiting for {lock_path}")
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(lock_path)
+
+def publish_forecast(history, forecast, params, param_names, order=SARIMA_ORDER,
+                     seasonal_order=SARIMA_SEASONAL_ORDER, source=None, converged=None, fit_warnings=(),
+                     path=DEFAULT_STORE_PATH):
+    """
+    Writes a new generation of the store. The file is built next to the
+    target and swapped in with os.replace, so readers see either the old
+    or the new generation, never a partial one. Concurrent publishers are
+    serialized by a lock file. Returns the generation number.
+    """
+    arrays = {
+        "history_months": _to_months(history.index),
+        "history_values": np.asarray(history.values, dtype=np.float64),
+        "forecast_months": _to_months(forecast.index),
+        "forecast_values": np.asarray(forecast.values, dtype=np.float64),
+        "params": np.asarray(params, dtype=np.float64),
+    }
+
+    offset = 0
+    layout = {}
+    for name, arr in arrays.items():
+        layout[name] = [offset, int(arr.size), arr.dtype.str]
+        offset = _align8(offset + arr.nbytes)
+
+    meta = json.dumps({
+        "series_name": history.name,
+        "source": source,
+        "order": list(order),
+        "seasonal_order": list(seasonal_order),
+        "param_names": list(param_names),
+        "converged": converged,
+        "warnings": list(fit_warnings),
+        "published_at": time.time(),
+        "arrays": layout,
+    }).encode("utf-8")
+    meta = meta.ljust(_align8(HEADER.size + len(meta)) - HEADER.size, b" ")
+
+    with _publish_lock(path):
+        generation = _read_generation(path) + 1
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(STORE_MAGIC, STORE_FORMAT_VERSION, generation, len(meta)))
+            f.write(meta)
+            for name, arr in arrays.items():
+                data = arr.tobytes()
+                f.write(data)
+                f.write(b"\0" * (_align8(len(data)) - len(data)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    return generation
+
+class ForecastStore:
+    """Read-only view of a published store. Call refresh() to pick up new generations."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.generation = 0
+        self.meta = {}
+        self._mm = None
+        self._arrays = {}
+        self._stat_key = None
+        self.refresh()
+
+    def refresh(self):
+        """Remaps the file if a new generation was published. Returns True if it changed."""
+        st = os.stat(self.path)
+        stat_key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stat_key == self._stat_key:
+            return False
+
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm.size() < HEADER.size:
+            mm.close()
+            raise ValueError(f"{self.path} is too short to be a forecast store")
+        magic, version, generation, meta_len = HEADER.unpack_from(mm, 0)
+        if magic != STORE_MAGIC or version != STORE_FORMAT_VERSION:
+            mm.close()
+            raise ValueError(f"{self.path} is not a forecast store (format {version})")
+
+        try:
+            meta = json.loads(mm[HEADER.size:HEADER.size + meta_len].decode("utf-8"))
+            data_start = HEADER.size + meta_len
+            arrays = {}
+            for name, (offset, count, dtype) in meta["arrays"].items():
+                arrays[name] = np.frombuffer(mm, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+            missing = ({"history_months", "history_values", "forecast_months", "forecast_values", "params"} - set(arrays)
+                       | {"order", "seasonal_order", "param_names", "series_name"} - set(meta))
+            if missing:
+                raise KeyError(", ".join(sorted(missing)))
+        except (KeyError, TypeError, ValueError) as e:
+            # Callers treat ValueError as "no store", so a corrupt file means a refit
+            raise ValueError(f"{self.path} has a corrupt forecast store layout: {e}") from None
+
+        # Old arrays keep the previous mapping alive until nobody references them
+        self._mm = mm
+        self._arrays = arrays
+        self.meta = meta
+        self.generation = generation
+        self._stat_key = stat_key
+        return True
+
+    @property
+    def params(self):
+        return dict(zip(self.meta["param_names"], self._arrays["params"].tolist()))
+
+    def history(self):
+        return pd.Series(self._arrays["history_values"], index=_from_months(self._arrays["history_months"]),
+                         name=self.meta["series_name"])
+
+    def forecast(self):
+        return pd.Series(self._arrays["forecast_values"], index=_from_months(self._arrays["forecast_months"]),
+                         name="predicted_mean")
+
+    def forecast_for(self, data_series, steps):
+        """
+        Returns the first `steps` forecast points if the store was fitted on
+        `data_series` with the current SARIMA orders, else None.
+        Non-positive `steps` (a year at or before the last observation) return None.
+        """
+        if steps < 1:
+            return None
+        if (tuple(self.meta["order"]) != SARIMA_ORDER
+                or tuple(self.meta["seasonal_order"]) != SARIMA_SEASONAL_ORDER):
+            return None
+        values = self._arrays["history_values"]
+        if steps > self._arrays["forecast_values"].size or values.size != len(data_series):
+            return None
+        if not np.array_equal(self._arrays["history_months"], _to_months(data_series.index)):
+            return None
+        if not np.allclose(values, data_series.values, equal_nan=True):
+            return None
+        return self.forecast().iloc[:steps]
+
+_attached = {}
+
+def open_forecast_store(path=DEFAULT_STORE_PATH):
+    """Attaches (once per process) and refreshes the store at `path`. Returns None if nothing is published."""
+    try:
+        store = _attached.get(path)
+        if store is None:
+            store = _attached[path] = ForecastStore(path)
+        else:
+            store.refresh()
+        return store
+    except (OSError, ValueError):
+        _attached.pop(path, None)
+        return None
+
+def load_index_series(csv_path, column="WPU1012"):
+    """Loads a FRED-style index CSV as a month-start series."""
+    df = pd.read_csv(csv_path)
+    df["observation_date"] = pd.to_datetime(df["observation_date"])
+    return df.set_index("observation_date").asfreq("MS")[column]
+
+def fit_and_publish(csv_path, horizon=120, path=DEFAULT_STORE_PATH):
+    """Fits SARIMAX on an index CSV and publishes `horizon` months of forecast. Returns the generation."""
+    import warnings
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    series = load_index_series(csv_path)
+    # Warnings are recorded with the store so readers can see convergence problems
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        model_fit = SARIMAX(series,
+                            order=SARIMA_ORDER,
+                            seasonal_order=SARIMA_SEASONAL_ORDER,
+                            enforce_stationarity=False,
+                            enforce_invertibility=False).fit(disp=False)
+        forecast = model_fit.get_forecast(steps=horizon).predicted_mean
+    converged = bool((model_fit.mle_retvals or {}).get("converged", True))
+    return publish_forecast(series, forecast, model_fit.params.values, model_fit.params.index,
+                            source=os.path.basename(csv_path), converged=converged,
+                            fit_warnings=sorted({str(w.message) for w in caught}), path=path)
+
+if __name__ == "__main__":
+    # Usage: python forecast_store.py [index_csv] [horizon_months]
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(script_dir, "WPU1012.csv")
+    horizon = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+
+    generation = fit_and_publish(csv_path, horizon)
+    print(json.dumps({"success": True, "generation": generation, "path": DEFAULT_STORE_PATH,
+                      "horizon": horizon}))
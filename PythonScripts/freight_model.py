@@ -0,0 +1,155 @@
+"""
+Probabilistic freight-rate model for cost-calculator-api.py
+Samples per-leg freight multipliers (from a local freight index CSV when
+available) together with base-price uncertainty to get landed-cost
+distributions per country
+"""
+import os
+import numpy as np
+import pandas as pd
+from trade_policy import FIELD_INDEX
+
+FREIGHT_LEGS = ("inland_freight_origin_per_ton", "ocean_freight_per_ton", "inland_freight_us_per_ton")
+
+# Column names expected in the freight index CSV, one per leg
+FREIGHT_INDEX_COLUMNS = {
+    "inland_freight_origin_per_ton": "inland_origin",
+    "ocean_freight_per_ton": "ocean",
+    "inland_freight_us_per_ton": "inland_us",
+}
+
+# Monthly log-volatility used when no freight index is available
+DEFAULT_MONTHLY_SIGMA = {
+    "inland_freight_origin_per_ton": 0.03,
+    "ocean_freight_per_ton": 0.12,
+    "inland_freight_us_per_ton": 0.025,
+}
+
+DEFAULT_FREIGHT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "freight_index.csv")
+
+# Lead time assumed when no delivery month is given
+DEFAULT_HORIZON_MONTHS = 6
+
+# Month the COUNTRY_CONFIG freight constants describe; horizons start here when
+# there is no freight index, so seeded runs give the same answer on any day
+DEFAULT_REFERENCE_MONTH = "2025-08-01"
+
+# Bounds on the number of draws per request (100k draws x 3 countries is ~2 MB)
+MAX_DRAWS = 1000000
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+class FreightModel:
+    """
+    Random walk with drift on log freight rates. Drift and the leg covariance
+    come from monthly log changes of the index; legs without index data use
+    DEFAULT_MONTHLY_SIGMA with no drift and no correlation. The COUNTRY_CONFIG
+    freight constants are taken as the rates at the last index observation.
+    """
+
+    def __init__(self, drift, cov, last_date=None):
+        self.drift = np.asarray(drift, dtype=np.float64)
+        self.cov = np.asarray(cov, dtype=np.float64)
+        self.last_date = last_date
+
+    @classmethod
+    def default(cls):
+        sigma = np.array([DEFAULT_MONTHLY_SIGMA[leg] for leg in FREIGHT_LEGS])
+        return cls(np.zeros(len(FREIGHT_LEGS)), np.diag(sigma ** 2))
+
+    @classmethod
+    def from_csv(cls, csv_path=DEFAULT_FREIGHT_INDEX_PATH):
+        """
+        Fits the model from a monthly freight index CSV. Falls back to default()
+        if the file is missing or unreadable, or the fit is not finite and positive definite.
+        """
+        try:
+            df = pd.read_csv(csv_path)
+            df["observation_date"] = pd.to_datetime(df["observation_date"])
+            df = df.set_index("observation_date").sort_index().asfreq("MS")
+        except (OSError, KeyError, ValueError, pd.errors.EmptyDataError):
+            return cls.default()
+
+        model = cls.default()
+        columns = [FREIGHT_INDEX_COLUMNS[leg] for leg in FREIGHT_LEGS]
+        present = [i for i, col in enumerate(columns) if col in df.columns]
+        if not present:
+            return model
+
+        # Non-numeric and non-positive index values are treated as missing
+        levels = df[[columns[i] for i in present]].apply(pd.to_numeric, errors="coerce")
+        log_changes = np.log(levels.where(levels > 0)).diff().dropna()
+        if len(log_changes) <= 2:
+            return model
+
+        drift = log_changes.mean().values
+        cov = np.atleast_2d(log_changes.cov().values)
+        if not (np.isfinite(drift).all() and np.isfinite(cov).all()):
+            return model
+        fitted = cls(model.drift.copy(), model.cov.copy(), df.index.max())
+        fitted.drift[present] = drift
+        fitted.cov[np.ix_(present, present)] = cov
+        try:
+            fitted.cholesky(1)
+        except np.linalg.LinAlgError:
+            # Covariance is not positive definite; keep the defaults
+            return model
+        return fitted
+
+    def horizon_months(self, delivery_month=None):
+        """Months from the last index observation (or DEFAULT_REFERENCE_MONTH) to delivery_month."""
+        if not delivery_month:
+            return DEFAULT_HORIZON_MONTHS
+        start = self.last_date if self.last_date is not None else pd.Timestamp(DEFAULT_REFERENCE_MONTH)
+        end = pd.Timestamp(delivery_month)
+        return max(0, (end.year - start.year) * 12 + (end.month - start.month))
+
+    def cholesky(self, horizon):
+        """Lower Cholesky factor of the leg covariance over `horizon` months."""
+        return np.linalg.cholesky(self.cov * horizon + np.eye(len(FREIGHT_LEGS)) * 1e-12)
+
+    def sample_multipliers(self, n, horizon, rng):
+        """Freight rate multipliers per leg, shape (n, legs). Mean-preserving when drift is zero."""
+        if horizon <= 0:
+            return np.ones((n, len(FREIGHT_LEGS)))
+        cov = self.cov * horizon
+        z = rng.standard_normal((n, len(FREIGHT_LEGS))) @ self.cholesky(horizon).T
+        # Lognormal correction so the mean multiplier is exp(drift * horizon)
+        return np.exp(z + self.drift * horizon - 0.5 * np.diag(cov))
+
+def sample_landed_costs(base_prices, rates, model, n=100000, horizon=0, base_price_sigma=0.10, seed=None):
+    """
+    Landed cost per ton draws, shape (n, countries).
+
+    base_prices: array (countries,), rates: array (countries, POLICY_FIELDS)
+    from trade_policy. Freight shocks are shared across countries (same
+    market index per leg); base-price shocks are independent per country.
+    """
+    if not 1 <= n <= MAX_DRAWS:
+        raise ValueError(f"draws must be between 1 and {MAX_DRAWS}, got {n}")
+    rng = np.random.default_rng(seed)
+    base_prices = np.asarray(base_prices, dtype=np.float64)
+    leg_cols = [FIELD_INDEX[leg] for leg in FREIGHT_LEGS]
+
+    ad_valorem = rates[:, [FIELD_INDEX["us_import_tariff"], FIELD_INDEX["anti_dumping_duty"],
+                           FIELD_INDEX["countervailing_duty"], FIELD_INDEX["origin_tax_rate"]]].sum(axis=1)
+    fixed = rates[:, FIELD_INDEX["other_costs_per_ton"]]
+    legs = rates[:, leg_cols]  # (countries, legs)
+
+    price_shock = np.exp(rng.standard_normal((n, len(base_prices))) * base_price_sigma - 0.5 * base_price_sigma ** 2)
+    freight = model.sample_multipliers(n, horizon, rng) @ legs.T  # (n, countries)
+    return (base_prices * price_shock) * (1.0 + ad_valorem) + freight + fixed
+
+def summarize_draws(draws, countries):
+    """Mean, std and percentiles per country."""
+    pct = np.percentile(draws, PERCENTILES, axis=0)
+    mean = draws.mean(axis=0)
+    std = draws.std(axis=0)
+    return {
+        country: {
+            "mean": float(mean[j]),
+            "std": float(std[j]),
+            **{f"p{p}": float(pct[i, j]) for i, p in enumerate(PERCENTILES)},
+        }
+        for j, country in enumerate(countries)
+    }
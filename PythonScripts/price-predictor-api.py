@@ -6,27 +6,66 @@ import sys
 import json
 import pandas as pd
 import numpy as np
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 import warnings
+from forecast_store import open_forecast_store, SARIMA_ORDER, SARIMA_SEASONAL_ORDER
+from scenario_cube import open_cube, forecast_inputs, forecast_versions
+from provenance_ledger import run_with_ledger
 
 warnings.filterwarnings("ignore")
 
-def get_sarima_forecast(data_series, steps):
-    """Trains a SARIMA model and returns the predicted mean."""
-    order = (1, 1, 1)
-    seasonal_order = (1, 1, 1, 12)
+def fit_sarima_forecast(data_series, steps):
+    """
+    Trains a SARIMA model and returns (predicted mean or None, provenance).
+    Warnings raised during the fit are captured so convergence problems are recorded.
+    """
+    # Imported here so cube and store hits don't pay for loading statsmodels
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    order = SARIMA_ORDER
+    seasonal_order = SARIMA_SEASONAL_ORDER
+    info = {"source": "fit", "order": [list(order), list(seasonal_order)]}
     
     try:
-        model = SARIMAX(data_series,
-                        order=order,
-                        seasonal_order=seasonal_order,
-                        enforce_stationarity=False,
-                        enforce_invertibility=False)
-        model_fit = model.fit(disp=False)
-        forecast = model_fit.get_forecast(steps=steps)
-        return forecast.predicted_mean
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            model = SARIMAX(data_series,
+                            order=order,
+                            seasonal_order=seasonal_order,
+                            enforce_stationarity=False,
+                            enforce_invertibility=False)
+            model_fit = model.fit(disp=False)
+            forecast = model_fit.get_forecast(steps=steps)
+        info["params"] = {k: float(v) for k, v in model_fit.params.items()}
+        info["converged"] = bool((model_fit.mle_retvals or {}).get("converged", True))
+        info["warnings"] = sorted({str(w.message) for w in caught})
+        return forecast.predicted_mean, info
     except Exception as e:
-        return None
+        info["converged"] = False
+        info["error"] = str(e)
+        return None, info
+
+def get_sarima_forecast(data_series, steps):
+    """Trains a SARIMA model and returns the predicted mean."""
+    return fit_sarima_forecast(data_series, steps)[0]
+
+def get_scrap_forecast(data_series, steps):
+    """
+    Uses the shared forecast store when it was fitted on the same series, else refits.
+    Returns (predicted mean or None, provenance).
+    """
+    store = open_forecast_store()
+    if store is not None:
+        cached = store.forecast_for(data_series, steps)
+        if cached is not None:
+            return cached, {
+                "source": "store",
+                "generation": store.generation,
+                "order": [store.meta["order"], store.meta["seasonal_order"]],
+                "params": store.params,
+                "converged": store.meta.get("converged"),
+                "warnings": store.meta.get("warnings", []),
+            }
+    return fit_sarima_forecast(data_series, steps)
 
 def run_forecasting_calculator(
     mw_capacity, 
@@ -38,6 +77,7 @@ def run_forecasting_calculator(
     selected_country
 ):
     """Combines SARIMAX forecasting with $/ton cost calculation."""
+    provenance = {"status": "ok", "country_factors": "csv"}
     try:
         # Load country adjustments (try multiple possible paths)
         import os
@@ -59,6 +99,7 @@ def run_forecasting_calculator(
             electricity = 1.0
             carbon_tax = 1.0
         cf = CountryFactors()
+        provenance["country_factors"] = "fallback"
 
     # Calculate Steel Tonnage
     tons_per_mw = 40.0
@@ -96,22 +137,31 @@ def run_forecasting_calculator(
         forecast_steps = (forecast_end_date.year - last_known_date.year) * 12 + (forecast_end_date.month - last_known_date.month)
         
         # Run SARIMAX Forecast
-        scrap_forecast_series = get_sarima_forecast(df_scrap['EAF_Input_Cost_Index'], steps=forecast_steps)
+        scrap_forecast_series, forecast_info = get_scrap_forecast(df_scrap['EAF_Input_Cost_Index'], steps=forecast_steps)
+        provenance.update(forecast_info)
         
         if scrap_forecast_series is None:
             # Fallback to last known price
             forecasted_scrap_price = bf_assumptions.get('scrap', 375.0)
+            provenance["status"] = "fallback_scrap_price"
         else:
             scrap_preds_year = scrap_forecast_series[scrap_forecast_series.index.year == future_construction_year]
             avg_pred_scrap_index = scrap_preds_year.mean()
             
-            # Bridge: Convert Index to $/ton
-            base_scrap_price = bf_assumptions.get('scrap', 375.0)
-            price_per_index_point = base_scrap_price / last_known_index
-            forecasted_scrap_price = avg_pred_scrap_index * price_per_index_point
+            if scrap_preds_year.empty or not np.isfinite(avg_pred_scrap_index):
+                # No forecast months in that year; same fallback as a failed fit
+                forecasted_scrap_price = bf_assumptions.get('scrap', 375.0)
+                provenance["status"] = "fallback_scrap_price"
+            else:
+                # Bridge: Convert Index to $/ton
+                base_scrap_price = bf_assumptions.get('scrap', 375.0)
+                price_per_index_point = base_scrap_price / last_known_index
+                forecasted_scrap_price = avg_pred_scrap_index * price_per_index_point
     except Exception as e:
         # Fallback if forecasting fails
         forecasted_scrap_price = bf_assumptions.get('scrap', 375.0)
+        provenance["status"] = "fallback_scrap_price"
+        provenance["error"] = str(e)
 
     # Calculate Total EAF Cost
     EAF_EMISSIONS_PER_TON = 0.6
@@ -143,6 +193,7 @@ def run_forecasting_calculator(
         "cost_percent_savings": float(cost_percent_savings),
         "bf_emissions_per_ton": BF_EMISSIONS_PER_TON,
         "eaf_emissions_per_ton": EAF_EMISSIONS_PER_TON,
+        "provenance": provenance,
     }
 
 if __name__ == "__main__":
@@ -151,15 +202,36 @@ if __name__ == "__main__":
         input_json = sys.argv[1] if len(sys.argv) > 1 else '{}'
         data = json.loads(input_json)
         
-        result = run_forecasting_calculator(
-            data.get('mw_capacity', 100.0),
-            data.get('future_year', 2027),
-            'WPU1012.csv',
-            data.get('bf_assumptions', {}),
-            data.get('eaf_assumptions', {}),
-            data.get('carbon_tax', 50.0),
-            data.get('country', 'US')
-        )
+        mw_capacity = data.get('mw_capacity', 100.0)
+        future_year = data.get('future_year', 2027)
+        bf_assumptions = data.get('bf_assumptions', {})
+        eaf_assumptions = data.get('eaf_assumptions', {})
+        carbon_tax = data.get('carbon_tax', 50.0)
+        country = data.get('country', 'US')
+
+        inputs = forecast_inputs(mw_capacity, future_year, bf_assumptions, eaf_assumptions, carbon_tax, country)
+        # Keyed on the data files and the model code/orders, so model changes invalidate old entries
+        versions = forecast_versions()
+
+        def compute():
+            # Answer from the precomputed scenario cube when the inputs fall on it
+            cube = open_cube()
+            if cube is not None and cube.matches(bf_assumptions, eaf_assumptions):
+                result = cube.forecast(country, future_year, carbon_tax, mw_capacity)
+                if result is not None:
+                    return result
+            return run_forecasting_calculator(
+                mw_capacity,
+                future_year,
+                'WPU1012.csv',
+                bf_assumptions,
+                eaf_assumptions,
+                carbon_tax,
+                country
+            )
+
+        # Repeat queries are answered from the provenance ledger
+        result = run_with_ledger("forecast", inputs, versions, compute)
         
         # Output JSON
         print(json.dumps(result))
@@ -0,0 +1,170 @@
+"""
+Append-only provenance ledger for forecast and cost runs
+Each run is stored in SQLite (WAL mode) with its input hash, data-file
+versions, model order, fitted params, convergence status and result.
+Converged, deterministic runs double as a warm cache for repeat queries.
+"""
+import os
+import json
+import math
+import time
+import hashlib
+import sqlite3
+
+LEDGER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "provenance_ledger.sqlite")
+
+# Pending rows are written in one transaction once this many are queued (and on flush/close).
+# Only long-lived callers such as the scenario cube build queue more than one row
+BATCH_SIZE = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    data_versions TEXT NOT NULL,
+    model_order TEXT,
+    params TEXT,
+    converged INTEGER,
+    status TEXT NOT NULL,
+    cacheable INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_lookup ON runs (kind, input_hash, cacheable);
+"""
+
+_file_versions = {}
+
+def _all_finite(value):
+    """True if every number nested in `value` is finite (NaN/inf results are never cached)."""
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if isinstance(value, dict):
+        return all(_all_finite(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return all(_all_finite(v) for v in value)
+    return True
+
+def data_versions(paths):
+    """SHA-256 (first 16 hex chars) of each existing file, keyed by basename. Cached per (mtime, size)."""
+    versions = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        key = (path, st.st_mtime_ns, st.st_size)
+        if key not in _file_versions:
+            with open(path, "rb") as f:
+                _file_versions[key] = hashlib.sha256(f.read()).hexdigest()[:16]
+        versions[os.path.basename(path)] = _file_versions[key]
+    return versions
+
+def input_hash(kind, inputs, versions):
+    """Stable hash of the run kind, canonical JSON inputs and data versions."""
+    payload = json.dumps([kind, inputs, versions], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ProvenanceLedger:
+    def __init__(self, path=LEDGER_PATH):
+        self.path = path
+        self._pending = []
+        self._conn = sqlite3.connect(path, timeout=2.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def lookup(self, kind, inputs, versions):
+        """Latest cacheable result for these inputs and data versions, or None."""
+        row = self._conn.execute(
+            "SELECT id, result FROM runs WHERE kind = ? AND input_hash = ? AND cacheable = 1 "
+            "ORDER BY id DESC LIMIT 1",
+            (kind, input_hash(kind, inputs, versions)),
+        ).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[1])
+        result.setdefault("provenance", {})["ledger_id"] = row[0]
+        return result
+
+    def record(self, kind, inputs, versions, result, cacheable=True):
+        """
+        Queues one run. Model order, params and convergence are read from
+        result["provenance"]; runs that did not converge or contain NaN/inf
+        values are never cached.
+        """
+        provenance = result.get("provenance", {})
+        converged = provenance.get("converged")
+        status = provenance.get("status", "ok" if result.get("success") else "error")
+        self._pending.append((
+            kind,
+            input_hash(kind, inputs, versions),
+            json.dumps(inputs, sort_keys=True),
+            json.dumps(versions, sort_keys=True),
+            json.dumps(provenance.get("order")) if "order" in provenance else None,
+            json.dumps(provenance.get("params")) if "params" in provenance else None,
+            None if converged is None else int(bool(converged)),
+            status,
+            int(bool(cacheable) and status == "ok" and converged is not False and _all_finite(result)),
+            json.dumps(result),
+            time.time(),
+        ))
+        if len(self._pending) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO runs (kind, input_hash, inputs, data_versions, model_order, params, "
+                "converged, status, cacheable, result, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+        self._pending = []
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
+
+def open_ledger(path=LEDGER_PATH):
+    """Opens the ledger, or returns None if SQLite is unavailable so runs still go through."""
+    try:
+        return ProvenanceLedger(path)
+    except sqlite3.Error:
+        return None
+
+def _close_quietly(ledger):
+    try:
+        ledger.close()
+    except sqlite3.Error:
+        pass
+
+def run_with_ledger(kind, inputs, versions, compute, cacheable=True, path=LEDGER_PATH):
+    """
+    Answers from the ledger when possible, otherwise calls compute() and records
+    the result. Ledger errors (e.g. a locked database) never affect the result.
+    """
+    ledger = open_ledger(path)
+    if ledger is not None:
+        try:
+            cached = ledger.lookup(kind, inputs, versions)
+        except sqlite3.Error:
+            cached = None
+        if cached is not None:
+            _close_quietly(ledger)
+            return cached
+
+    result = compute()
+
+    if ledger is not None:
+        try:
+            ledger.record(kind, inputs, versions, result, cacheable=cacheable)
+        except sqlite3.Error:
+            pass
+        _close_quietly(ledger)
+    return result
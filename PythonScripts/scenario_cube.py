@@ -0,0 +1,248 @@
+"""
+Precomputed scenario cube for the forecast and results pages
+Evaluates run_forecasting_calculator over a grid of
+(country, year, carbon tax, MW capacity) and stores it as a memory-mapped .npy
+with a JSON sidecar holding the axes. Rebuilt only when inputs or model code change.
+
+Usage: python scenario_cube.py [--force]
+"""
+import os
+import sys
+import json
+import hashlib
+import importlib.util
+import itertools
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CUBE_PATH = os.path.join(SCRIPT_DIR, "scenario_cube.npy")
+CUBE_META_PATH = os.path.join(SCRIPT_DIR, "scenario_cube.json")
+
+SCRAP_FILE = "WPU1012.csv"
+COUNTRY_FACTORS_FILE = "country_cost_factors - Sheet1.csv"
+
+# Data and code the cube depends on; any change triggers a rebuild
+FINGERPRINT_FILES = (
+    SCRAP_FILE,
+    COUNTRY_FACTORS_FILE,
+    "price-predictor-api.py",
+    "forecast_store.py",
+    "scenario_cube.py",
+)
+
+GRID = {
+    "year": list(range(2025, 2041)),
+    "carbon_tax": [float(x) for x in range(0, 301, 25)],
+    "mw_capacity": [10.0, 50.0, 100.0, 250.0, 500.0, 1000.0],
+}
+
+# Same defaults as app/api/forecast-price/route.ts
+BF_ASSUMPTIONS = {"iron_ore": 130.0, "coking_coal": 280.0, "bf_fluxes": 50.0, "scrap": 375.0, "other_costs_bf": 50.0}
+EAF_ASSUMPTIONS = {"electricity": 0.08, "electrode": 2.5, "eaf_fluxes": 60.0, "other_costs_eaf": 40.0}
+
+# Stored per grid point; ratios and products are derived after interpolation
+METRICS = (
+    "total_steel_tons",
+    "bf_cost_per_ton",
+    "eaf_cost_per_ton",
+    "forecasted_scrap_price",
+    "bf_emissions_per_ton",
+    "eaf_emissions_per_ton",
+    "scrap_fallback",
+)
+
+# Forecast provenance copied from the build into the cube metadata
+MODEL_PROVENANCE_KEYS = ("source", "generation", "order", "params", "converged", "warnings")
+
+def _load_script(filename, name):
+    """Imports one of the hyphenated API scripts as a module."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def fingerprint(grid=GRID):
+    h = hashlib.sha256()
+    for filename in FINGERPRINT_FILES:
+        h.update(filename.encode("utf-8"))
+        with open(os.path.join(SCRIPT_DIR, filename), "rb") as f:
+            h.update(f.read())
+    h.update(json.dumps([grid, BF_ASSUMPTIONS, EAF_ASSUMPTIONS], sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+def forecast_versions():
+    """Ledger data versions for forecast runs: data files, model code and SARIMA orders."""
+    from forecast_store import SARIMA_ORDER, SARIMA_SEASONAL_ORDER
+    from provenance_ledger import data_versions
+
+    versions = data_versions([os.path.join(SCRIPT_DIR, f) for f in FINGERPRINT_FILES])
+    versions["sarima_order"] = [list(SARIMA_ORDER), list(SARIMA_SEASONAL_ORDER)]
+    return versions
+
+def forecast_inputs(mw_capacity, future_year, bf_assumptions, eaf_assumptions, carbon_tax, country):
+    """Ledger inputs for one forecast run, shared by the API and the cube build."""
+    return {
+        "mw_capacity": mw_capacity,
+        "future_year": future_year,
+        "bf_assumptions": bf_assumptions,
+        "eaf_assumptions": eaf_assumptions,
+        "carbon_tax": carbon_tax,
+        "country": country,
+    }
+
+def is_stale(grid=GRID):
+    try:
+        with open(CUBE_META_PATH) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return True
+    return meta.get("fingerprint") != fingerprint(grid) or not os.path.exists(CUBE_PATH)
+
+def build_cube(grid=GRID, force=False):
+    """Evaluates the grid and writes CUBE_PATH / CUBE_META_PATH. Returns False if already up to date."""
+    if not force and not is_stale(grid):
+        return False
+
+    import sqlite3
+    from forecast_store import fit_and_publish, load_index_series
+    from provenance_ledger import open_ledger
+    predictor = _load_script("price-predictor-api.py", "price_predictor_api")
+
+    # Publish a forecast that reaches the last grid year so every cell reuses one SARIMAX fit
+    last_known = load_index_series(os.path.join(SCRIPT_DIR, SCRAP_FILE)).index.max()
+    horizon = (max(grid["year"]) - last_known.year) * 12 + (12 - last_known.month)
+    fit_and_publish(os.path.join(SCRIPT_DIR, SCRAP_FILE), max(horizon, 1))
+
+    countries = pd.read_csv(os.path.join(SCRIPT_DIR, COUNTRY_FACTORS_FILE))["country"].tolist()
+    axes = {"country": countries, **grid}
+    shape = tuple(len(v) for v in axes.values()) + (len(METRICS),)
+
+    tmp_path = CUBE_PATH + ".tmp.npy"
+    cube = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=shape)
+    model = None
+
+    # Every grid run goes into the provenance ledger; rows are inserted in batches
+    ledger = open_ledger()
+    versions = forecast_versions()
+
+    for (ci, country), (yi, year), (ti, carbon_tax), (mi, mw) in itertools.product(
+            enumerate(countries), enumerate(grid["year"]), enumerate(grid["carbon_tax"]),
+            enumerate(grid["mw_capacity"])):
+        result = predictor.run_forecasting_calculator(
+            mw, year, SCRAP_FILE, BF_ASSUMPTIONS, EAF_ASSUMPTIONS, carbon_tax, country
+        )
+        if ledger is not None:
+            try:
+                ledger.record("forecast", forecast_inputs(mw, year, BF_ASSUMPTIONS, EAF_ASSUMPTIONS, carbon_tax, country),
+                              versions, result)
+            except sqlite3.Error:
+                ledger = None
+        provenance = result["provenance"]
+        result["scrap_fallback"] = float(provenance["status"] != "ok")
+        if provenance["status"] == "ok" and model is None:
+            model = {k: provenance[k] for k in MODEL_PROVENANCE_KEYS if k in provenance}
+        cube[ci, yi, ti, mi] = [result[k] for k in METRICS]
+
+    if ledger is not None:
+        try:
+            ledger.close()
+        except sqlite3.Error:
+            pass
+
+    cube.flush()
+    del cube
+    os.replace(tmp_path, CUBE_PATH)
+    with open(CUBE_META_PATH, "w") as f:
+        json.dump({
+            "fingerprint": fingerprint(grid),
+            "axes": axes,
+            "metrics": list(METRICS),
+            "model": model or {},
+            "bf_assumptions": BF_ASSUMPTIONS,
+            "eaf_assumptions": EAF_ASSUMPTIONS,
+        }, f, indent=2)
+    return True
+
+class ScenarioCube:
+    """Memory-mapped cube with multilinear interpolation over the numeric axes."""
+
+    def __init__(self, cube_path=CUBE_PATH, meta_path=CUBE_META_PATH):
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        self.data = np.load(cube_path, mmap_mode="r")
+        axes = self.meta["axes"]
+        self.countries = {c: i for i, c in enumerate(axes["country"])}
+        self.numeric_axes = [np.asarray(axes[name], dtype=np.float64) for name in ("year", "carbon_tax", "mw_capacity")]
+        self.metrics = self.meta["metrics"]
+
+    def matches(self, bf_assumptions, eaf_assumptions):
+        """True if the cube was built with these material assumptions."""
+        def same(a, b):
+            return set(a) == set(b) and all(float(a[k]) == float(b[k]) for k in a)
+        return same(bf_assumptions, self.meta["bf_assumptions"]) and same(eaf_assumptions, self.meta["eaf_assumptions"])
+
+    def _bracket(self, axis, value):
+        if value < axis[0] or value > axis[-1]:
+            return None
+        hi = min(int(np.searchsorted(axis, value, side="right")), len(axis) - 1)
+        lo = max(hi - 1, 0)
+        span = axis[hi] - axis[lo]
+        weight = 0.0 if span == 0 else (value - axis[lo]) / span
+        return lo, hi, weight
+
+    def slice(self, country, year, carbon_tax, mw_capacity):
+        """Interpolated metric vector, or None if the point is outside the grid."""
+        ci = self.countries.get(country)
+        if ci is None:
+            return None
+        brackets = [self._bracket(axis, float(v)) for axis, v in zip(self.numeric_axes, (year, carbon_tax, mw_capacity))]
+        if any(b is None for b in brackets):
+            return None
+
+        block = self.data[ci][tuple(slice(lo, hi + 1) for lo, hi, _ in brackets)]
+        weights = [np.array([1.0 - w, w]) if hi > lo else np.ones(1) for lo, hi, w in brackets]
+        return np.einsum("i,j,k,ijkm->m", *weights, block)
+
+    def forecast(self, country, year, carbon_tax, mw_capacity):
+        """Same keys as run_forecasting_calculator, or None if the point is outside the grid."""
+        values = self.slice(country, year, carbon_tax, mw_capacity)
+        if values is None:
+            return None
+        m = dict(zip(self.metrics, values.tolist()))
+        bf_cost, eaf_cost = m["bf_cost_per_ton"], m["eaf_cost_per_ton"]
+        bf_emissions, eaf_emissions = m["bf_emissions_per_ton"], m["eaf_emissions_per_ton"]
+        # Same derivations as run_forecasting_calculator, from the interpolated costs
+        cost_spread_per_ton = bf_cost - eaf_cost
+        return {
+            "success": True,
+            "total_steel_tons": m["total_steel_tons"],
+            "bf_cost_per_ton": bf_cost,
+            "eaf_cost_per_ton": eaf_cost,
+            "forecasted_scrap_price": m["forecasted_scrap_price"],
+            "cost_spread_per_ton": cost_spread_per_ton,
+            "total_project_cost_savings": cost_spread_per_ton * m["total_steel_tons"],
+            "emissions_percent_savings": (bf_emissions - eaf_emissions) / bf_emissions,
+            "cost_percent_savings": cost_spread_per_ton / bf_cost if bf_cost > 0 else 0,
+            "bf_emissions_per_ton": bf_emissions,
+            "eaf_emissions_per_ton": eaf_emissions,
+            "provenance": {
+                **self.meta.get("model", {}),
+                "status": "fallback_scrap_price" if m["scrap_fallback"] > 0 else "ok",
+                "source": "cube",
+                "cube_fingerprint": self.meta["fingerprint"][:16],
+            },
+        }
+
+def open_cube():
+    """Loads the cube if it exists and matches the current inputs and code, else None."""
+    try:
+        if is_stale():
+            return None
+        return ScenarioCube()
+    except (OSError, ValueError, KeyError):
+        return None
+
+if __name__ == "__main__":
+    built = build_cube(force="--force" in sys.argv)
+    print(json.dumps({"success": True, "rebuilt": built, "path": CUBE_PATH}))
@@ -0,0 +1,167 @@
+"""
+Effective-dated trade policy timeline for cost-calculator-api.py
+Tariff, duty and freight-rate tables indexed by (country, product, date),
+plus a vectorized landed-cost pass for bulk what-if scenarios
+"""
+import numpy as np
+
+# Order of the per-ton rate columns used by the vectorized functions
+POLICY_FIELDS = (
+    "us_import_tariff",
+    "anti_dumping_duty",
+    "countervailing_duty",
+    "origin_tax_rate",
+    "inland_freight_origin_per_ton",
+    "ocean_freight_per_ton",
+    "inland_freight_us_per_ton",
+    "other_costs_per_ton",
+)
+FIELD_INDEX = {name: i for i, name in enumerate(POLICY_FIELDS)}
+
+ALL_PRODUCTS = "*"
+
+# Effective date of the first row of every table; changes dated here replace the base row
+BASE_DATE = "0001-01-01"
+
+# (country, product, effective date, overrides). Each change carries forward
+# until the next one for the same country/product. See data/TRADE_POLICY_SOURCES.md
+POLICY_CHANGES = [
+    # Before Section 232 most steel mill products entered at a 0% MFN duty
+    ("China", ALL_PRODUCTS, BASE_DATE, {"us_import_tariff": 0.0}),
+    ("India", ALL_PRODUCTS, BASE_DATE, {"us_import_tariff": 0.0}),
+    # Section 232 steel tariff, 25% from March 2018
+    ("China", ALL_PRODUCTS, "2018-03-23", {"us_import_tariff": 0.25}),
+    ("India", ALL_PRODUCTS, "2018-03-23", {"us_import_tariff": 0.25}),
+    # Section 232 raised to 50% (June 2025), average AD/CVD from tradePolicy.ts
+    ("China", ALL_PRODUCTS, "2025-06-04", {"us_import_tariff": 0.50,
+                                           "anti_dumping_duty": 0.15,
+                                           "countervailing_duty": 0.10}),
+    ("India", ALL_PRODUCTS, "2025-06-04", {"us_import_tariff": 0.50,
+                                           "anti_dumping_duty": 0.02,
+                                           "countervailing_duty": 0.03}),
+]
+
+def to_day(date):
+    """Accepts 'YYYY-MM', 'YYYY-MM-DD' or datetime64 (scalar or array) -> datetime64[D]."""
+    return np.asarray(date, dtype="datetime64[D]")
+
+def field_index(name):
+    """Column of a POLICY_FIELDS entry; raises ValueError naming unknown fields."""
+    try:
+        return FIELD_INDEX[name]
+    except KeyError:
+        raise ValueError(f"Unknown policy field {name!r}; expected one of {', '.join(POLICY_FIELDS)}") from None
+
+def config_row(cfg):
+    """Flattens a COUNTRY_CONFIG entry into POLICY_FIELDS order."""
+    return np.array([float(cfg.get(name, 0.0)) for name in POLICY_FIELDS])
+
+class PolicyTimeline:
+    """
+    Per (country, product) step functions over time. Rows are full snapshots of
+    POLICY_FIELDS, so a lookup is one binary search and one row read.
+    """
+
+    def __init__(self, base_config, changes=POLICY_CHANGES):
+        self.countries = list(base_config)
+        self._base_rows = {country: config_row(cfg) for country, cfg in base_config.items()}
+        self._tables = {}
+
+        grouped = {}
+        for country, product, effective, overrides in changes:
+            grouped.setdefault((country, product), []).append((to_day(effective), overrides))
+
+        for country, base_row in self._base_rows.items():
+            shared = grouped.get((country, ALL_PRODUCTS), [])
+            self._tables[(country, ALL_PRODUCTS)] = self._build(base_row, shared)
+            # Product tables layer their own changes over the all-products timeline
+            for (c, product), entries in grouped.items():
+                if c == country and product != ALL_PRODUCTS:
+                    self._tables[(country, product)] = self._build(base_row, shared + entries)
+
+    @staticmethod
+    def _build(base_row, entries):
+        # Stable sort: on the same date a product change wins over the all-products one
+        entries = sorted(entries, key=lambda e: e[0])
+        dates = [np.datetime64(BASE_DATE, "D")]
+        rows = [base_row]
+        for effective, overrides in entries:
+            row = rows[-1].copy()
+            for name, value in overrides.items():
+                row[field_index(name)] = value
+            if dates[-1] == effective:
+                rows[-1] = row
+            else:
+                dates.append(effective)
+                rows.append(row)
+        return np.array(dates, dtype="datetime64[D]"), np.vstack(rows)
+
+    def _table(self, country, product):
+        return self._tables.get((country, product or ALL_PRODUCTS)) or self._tables[(country, ALL_PRODUCTS)]
+
+    def rates(self, country, dates, product=None):
+        """
+        Rate rows in force on `dates` (scalar or array) -> array (..., len(POLICY_FIELDS)).
+        dates=None returns the undated COUNTRY_CONFIG rates.
+        """
+        if dates is None:
+            return self._base_rows[country]
+        table_dates, rows = self._table(country, product)
+        pos = np.searchsorted(table_dates, to_day(dates), side="right") - 1
+        return rows[pos]
+
+    def lookup(self, country, date, product=None):
+        """Policy in force for one country on one date, as a dict keyed by POLICY_FIELDS."""
+        return dict(zip(POLICY_FIELDS, self.rates(country, date, product).tolist()))
+
+    def rate_matrix(self, date, countries=None, product=None):
+        """Rates for several countries on one date -> array (countries, fields)."""
+        return np.vstack([self.rates(c, date, product) for c in (countries or self.countries)])
+
+def landed_cost_array(base_prices, rates):
+    """
+    Vectorized compute_landed_cost_per_ton. `base_prices` broadcasts against
+    rates[..., 0]; returns landed cost per ton with the same broadcast shape.
+    """
+    base_prices = np.asarray(base_prices, dtype=np.float64)
+    ad_valorem = (
+        rates[..., FIELD_INDEX["us_import_tariff"]]
+        + rates[..., FIELD_INDEX["anti_dumping_duty"]]
+        + rates[..., FIELD_INDEX["countervailing_duty"]]
+        + rates[..., FIELD_INDEX["origin_tax_rate"]]
+    )
+    per_ton = (
+        rates[..., FIELD_INDEX["inland_freight_origin_per_ton"]]
+        + rates[..., FIELD_INDEX["ocean_freight_per_ton"]]
+        + rates[..., FIELD_INDEX["inland_freight_us_per_ton"]]
+        + rates[..., FIELD_INDEX["other_costs_per_ton"]]
+    )
+    return base_prices * (1.0 + ad_valorem) + per_ton
+
+def scenario_rates(timeline, date, scenarios, countries, product=None):
+    """
+    Builds an array (scenarios, countries, fields) from the policy in force on
+    `date` with each scenario's overrides applied, e.g.
+    {"name": "no_232", "overrides": {"China": {"us_import_tariff": 0.0}}}
+    """
+    base = timeline.rate_matrix(date, countries, product)
+    rates = np.broadcast_to(base, (len(scenarios),) + base.shape).copy()
+    col = {c: i for i, c in enumerate(countries)}
+    for s, scenario in enumerate(scenarios):
+        for country, overrides in scenario.get("overrides", {}).items():
+            if country not in timeline.countries:
+                raise ValueError(f"Unknown country {country!r} in scenario overrides; "
+                                 f"expected one of {', '.join(timeline.countries)}")
+            if country not in col:
+                # Valid country without a base price in this request
+                continue
+            for name, value in overrides.items():
+                rates[s, col[country], field_index(name)] = value
+    return rates
+
+def run_scenarios(timeline, date, base_prices, scenarios, product=None):
+    """Landed cost per ton for every scenario and country in one pass -> (countries, array (scenarios, countries))."""
+    countries = [c for c in timeline.countries if c in base_prices]
+    rates = scenario_rates(timeline, date, scenarios, countries, product)
+    prices = np.array([base_prices[c] for c in countries], dtype=np.float64)
+    return countries, landed_cost_array(prices[None, :], rates)